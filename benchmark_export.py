@@ -0,0 +1,66 @@
+# Benchmark: measures how fast export_tasks() streams a big tasks file out to csv or jsonl
+# Run it with: python benchmark_export.py (or --tasks 1000000 for a quicker run)
+# It writes a generated tasks file and the export to a temporary folder and removes both afterwards
+
+# ===== importing libraries ===========
+# argparse lets us pick the size of the run from the command line
+import argparse
+# We'll keep the generated files out of the project folder
+import os
+import tempfile
+# perf_counter gives us an accurate timer
+import time
+
+# Importing the task manager only loads its functions, the program itself doesn't start
+from task_manager_v2 import EXPORT_CHUNK_SIZE, export_tasks
+
+
+# Writes a tasks file in the usual tasks.txt format with the given number of tasks
+# some descriptions have commas in them so the export has to quote them
+def generate_tasks_file(tasks_file_path: str, task_count: int) -> None:
+    users = ["admin", "mike", "mark", "mick", "julie"]
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    lines = []
+
+    with open(tasks_file_path, "w", encoding="utf-8") as tasks_file:
+        for i in range(task_count):
+            lines.append(f"{users[i % 5]}, Task {i}, Description {i}, with a comma, "
+                         f"{i % 28 + 1:02d} {months[i % 12]} 2023, {(i * 7) % 28 + 1:02d} {months[(i + 3) % 12]} 2024, "
+                         f"{'Yes' if i % 3 == 0 else 'No'}\n")
+
+            # We'll write in batches so generating the file doesn't need much memory either
+            if len(lines) >= 100000:
+                tasks_file.writelines(lines)
+                lines = []
+
+        tasks_file.writelines(lines)
+
+
+parser = argparse.ArgumentParser(description="Measure the throughput of the streaming task export")
+parser.add_argument("--tasks", type=int, default=10_000_000, help="how many tasks to generate")
+parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="export format")
+parser.add_argument("--compress", action="store_true", help="gzip the export")
+parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="rows written per batch")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory(prefix="task-export-bench-") as bench_dir:
+    tasks_path = os.path.join(bench_dir, "tasks.txt")
+    export_path = os.path.join(bench_dir, f"tasks_export.{args.format}")
+
+    print(f"Generating {args.tasks:,} tasks...")
+    generate_tasks_file(tasks_path, args.tasks)
+    tasks_size = os.path.getsize(tasks_path)
+
+    start_time = time.perf_counter()
+    export_count = export_tasks(tasks_path, export_path, args.format, chunk_size=args.chunk_size,
+                                compress=args.compress)
+    elapsed = time.perf_counter() - start_time
+
+    if args.compress:
+        export_path += ".gz"
+
+    print(f"Exported {export_count:,} tasks to {args.format}{' (gzip)' if args.compress else ''} "
+          f"in {elapsed:.2f}s")
+    print(f"Throughput:  {export_count / elapsed:,.0f} tasks/s, {tasks_size / elapsed / 1024 / 1024:.1f} MB/s read")
+    print(f"Export size: {os.path.getsize(export_path) / 1024 / 1024:.1f} MB "
+          f"(tasks file was {tasks_size / 1024 / 1024:.1f} MB)")
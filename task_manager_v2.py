@@ -6,16 +6,39 @@
 # ===== importing libraries ===========
 '''This is the section where you will import libraries'''
 # We'll need the current date when assigning tasks
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 # We need some functions from typing Typevar to create our placeholder types and Union
 # to indicate we can return multiple types
 from typing import TypeVar, Union
 # We need this to compare dates, convert to date etc
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+# calendar tells us how many days are in a month for monthly recurring tasks
+import calendar
 # We'll need to wrap the text when printing out tasks to the user
 import textwrap
+# islice lets us take just the first few of the occurrences a generator hands back
+import itertools
 # We're importing os primarily to check for file existence
 import os
+# OrderedDict keeps our loaded projects in least recently used order
+from collections import OrderedDict
+# csv and json give us properly quoted export formats, gzip lets us compress the exports
+import csv
+import json
+import gzip
+# heapq merges our sorted runs and tempfile gives us somewhere to spill them when sorting big task files
+import heapq
+import tempfile
+# sys.getsizeof helps us guess how much memory the tasks we're sorting take up
+import sys
+# The background writer needs a thread, a queue to hand it saves and a timer to group saves together
+# atexit makes sure anything still waiting to be saved is written when the program exits
+import threading
+import queue
+import time
+import atexit
+# stat lets us copy the permissions of tasks.txt onto the file that replaces it
+import stat
 
 # Here we're creating a type variable T bound to "User" that we'll use as a place-holder to
 # indicate the User as a type
@@ -81,6 +104,132 @@ class Task:
                "\n—————————————————————————————————————————————————————————————————————"
 
 
+# We'll remember which tasks file we've read (by its inode) and how many bytes of it we've parsed
+# so when another session appends to it we only need to read the new part
+@dataclass
+class TaskFilePosition:
+    inode: int
+    offset: int
+
+
+# Rewriting the whole tasks file after every edit freezes the prompt on big files, so saves are handed
+# to this background writer instead. Handing over a save only records which list and path need writing,
+# so it takes the same time no matter how big the file is. Saves made within coalesce_window seconds
+# of each other are written out once
+class TaskWriter(threading.Thread):
+    def __init__(self, coalesce_window: float):
+        super().__init__(daemon=True)
+        self.coalesce_window = coalesce_window
+        self.save_queue = queue.Queue()
+        # path -> (tasks list, save number) for every save that hasn't been written yet
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.save_count = 0
+        self.started = False
+        # paths whose last write didn't make it to the file
+        self.failed = set()
+
+    # The thread is started by the first save, so just importing this file doesn't start it
+    def save(self, tasks_list: list[Task], tasks_path: str) -> None:
+        with self.pending_lock:
+            self.save_count += 1
+            self.pending[tasks_path] = (tasks_list, self.save_count)
+            if not self.started:
+                self.started = True
+                self.start()
+        self.save_queue.put(tasks_path)
+
+    def is_pending(self, tasks_path: str) -> bool:
+        with self.pending_lock:
+            return tasks_path in self.pending
+
+    def save_failed(self, tasks_path: str) -> bool:
+        with self.pending_lock:
+            return tasks_path in self.failed
+
+    # Waits until every save handed over so far has been written
+    def flush(self) -> None:
+        if self.is_alive():
+            self.save_queue.join()
+
+    # Writes anything still waiting and stops the thread, None tells run() to stop
+    def close(self) -> None:
+        if not self.is_alive():
+            return
+        self.save_queue.put(None)
+        self.join()
+
+    def run(self) -> None:
+        running = True
+        while running:
+            batch = [self.save_queue.get()]
+
+            # We'll keep collecting saves until the window closes or we're told to stop
+            deadline = time.monotonic() + self.coalesce_window
+            while batch[-1] is not None:
+                try:
+                    batch.append(self.save_queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            running = batch[-1] is not None
+
+            # Each path only needs writing once, with whatever the list holds now
+            # task_done() always runs so flush() can't get stuck, and one failed path doesn't stop the writer
+            try:
+                for tasks_path in dict.fromkeys(path for path in batch if path is not None):
+                    # An earlier batch may already have written this save, in which case there's nothing to do
+                    with self.pending_lock:
+                        pending_save = self.pending.get(tasks_path)
+                    if pending_save is None:
+                        continue
+
+                    tasks_list, save_number = pending_save
+                    saved = False
+                    try:
+                        saved = merge_file_changes(tasks_list, tasks_path) and save_tasks(list(tasks_list), tasks_path)
+                    except Exception:
+                        print("There's been a general problem saving your tasks... please check your system")
+                    finally:
+                        # If another save came in while we were writing we leave it pending, it's already queued
+                        with self.pending_lock:
+                            if saved:
+                                self.failed.discard(tasks_path)
+                            else:
+                                self.failed.add(tasks_path)
+                            if tasks_path in self.pending and self.pending[tasks_path][1] == save_number:
+                                del self.pending[tasks_path]
+            finally:
+                for _ in batch:
+                    self.save_queue.task_done()
+
+
+# A recurring task is stored once in recurring.txt with a rule saying how often it comes around
+# rule is daily, weekly or monthly and interval is how many of those there are between occurrences
+# materialized holds the dates of the occurrences that have been edited, those are real tasks in tasks.txt now
+@dataclass
+class RecurringTask:
+    assigned_to: str
+    task: str
+    task_description: str
+    start_date: str
+    rule: str
+    interval: int
+    materialized: set[str] = field(default_factory=set)
+
+    def get_start_date(self) -> date:
+        return datetime.strptime(self.start_date, "%d %b %Y").date()
+
+
+# A project is a named task list with its own tasks file, the loaded ones are kept in project_cache
+@dataclass
+class Project:
+    name: str
+    tasks_path: str
+    tasks: list[Task]
+    recurring_tasks: list[RecurringTask]
+
+
 # -------- Functions --------
 # Function to load users text and create dictionary
 def check_number(string_input: str) -> Union[int, None]:
@@ -101,6 +250,15 @@ def check_date(date_input: str) -> Union[datetime, None]:
         return None
 
 
+# The user name and title sit between ", " separators in tasks.txt, so a ", " inside either of them
+# would be read back as the start of the next field, we'll ask for them again instead
+def check_task_field(field_input: str, field_name: str) -> bool:
+    if ", " in field_input:
+        print(f"The {field_name} can't contain a comma followed by a space... Please try again")
+        return False
+    return True
+
+
 # We'll create a function that can read our users.txt and create a dictionary
 # pairing their passwords to their usernames
 def open_users_to_dict(text_file: str) -> dict[str: str]:
@@ -194,7 +352,7 @@ def reg_user(users_dict: dict) -> Union[dict, None]:
 
 
 # Add a task to tasks.txt return a list of updated tasks
-def add_task(users_dict: dict, tasks_file_path: str) -> Union[list[Task], None]:
+def add_task(users_dict: dict, tasks_list: list[Task], tasks_file_path: str) -> list[Task]:
     # initialize the date.today() function to var today
     today = date.today()
 
@@ -206,13 +364,19 @@ def add_task(users_dict: dict, tasks_file_path: str) -> Union[list[Task], None]:
                                "(type q to go back to Main Menu): ")
 
         if return_to_menu(user_to_assign) is None:
-            return
+            return tasks_list
+
+        if not check_task_field(user_to_assign, "username"):
+            continue
 
         # if the user exists we'll prompt the user, and assign their input to variables
         # and if not we'll ask them to try again
         if user_to_assign in users_dict:
             print("Success!!! Username found...")
-            task_title = input("Please input the task title: ")
+            while True:
+                task_title = input("Please input the task title: ")
+                if check_task_field(task_title, "task title"):
+                    break
             task_description = input("Please write a description of the task: ")
             while True:
                 task_due_date = input("What is the task due date (for example: 10 Oct 2022): ")
@@ -236,65 +400,225 @@ def add_task(users_dict: dict, tasks_file_path: str) -> Union[list[Task], None]:
     # We'll try to write the successful input from above to the tasks.txt file
     # We'll handle to errors and ask the user to check the tasks.txt
     # in a case where there is a problem with the file it will affect our ability to successfully read it
+    # Any edits still waiting in the background writer go first, otherwise their rewrite would drop this task
+    task_writer.flush()
+    new_task_line = f"{user_to_assign}, {task_title}, {task_description}, {current_date}, " \
+                    f"{str(task_due_date.strftime('%d %b %Y'))}, {task_complete}"
     try:
-        with open("tasks.txt", "a", encoding="utf-8") as tasks_file:
-            tasks_file.write(f"\n{user_to_assign}, {task_title}, {task_description}, {current_date}, "
-                             f"{str(task_due_date.strftime('%d %b %Y'))}, {task_complete}")
+        with open(tasks_file_path, "a", encoding="utf-8") as tasks_file:
+            tasks_file.write(f"\n{new_task_line}")
     except IndexError:
         print("The text file may be tampered with please re-download the tasks.txt file and try again")
-        return
+        return tasks_list
     except FileNotFoundError:
         print("Is the tasks.txt file present? Please look in your projects dir and try again")
-        return
+        return tasks_list
 
     # An extra print for visual space
     print()
 
-    # update the current task list
-    tasks_list = load_tasks(tasks_file_path)
-    if tasks_list is None:
+    # update the current task list, this only parses what's been appended since we last read the file
+    # The list can also shrink if another session replaced the file, so rather than counting tasks we check
+    # our new task was read back in. It'll be at or near the end so we look from there
+    tasks_list = refresh_tasks(tasks_list, tasks_file_path)
+    new_task = parse_task_line(new_task_line)
+    if not any(task == new_task for task in reversed(tasks_list)):
         print("There's been a error creating your task!")
-        return
+        return tasks_list
 
     print("———— Task has been successfully added! ————")
     return tasks_list
 
 
-# View all simply goes through the task list printing each
+# View all simply goes through the numbered tasks printing each
 # all we need to do is call print(task) as the dunder method in class
 # takes care of the string representation
-def view_all(list_of_tasks: list[Task]):
+# numbered_tasks can be anything that gives us (task number, task) pairs, for example enumerate(tasks)
+# or the sorted stream from external_sort_tasks(), we'll pause after every page so long lists stay readable
+def view_all(numbered_tasks, page_size: Union[int, None] = None):
     print("\033[1m" + "———— View All Tasks ————" + "\033[0m")
 
-    for task in list_of_tasks:
-        print(YELLOW + BOLD + f"Task Number: {list_of_tasks.index(task)}" + ESCAPE)
+    if page_size is None:
+        page_size = PAGE_SIZE
+
+    # We look one task ahead so we only ask to see more when there actually is more
+    numbered_tasks = iter(numbered_tasks)
+    next_task = next(numbered_tasks, None)
+    shown = 0
+
+    while next_task is not None:
+        task_number, task = next_task
+        print(YELLOW + BOLD + f"Task Number: {task_number}" + ESCAPE)
         print(task)
+        shown += 1
+
+        next_task = next(numbered_tasks, None)
+        if next_task is not None and shown % page_size == 0:
+            next_page = input("Press Enter to see more tasks (or type q to go back to Main Menu): ")
+            if return_to_menu(next_page) is None:
+                return
 
     print("\033[1m" + "———— END OF TASKS ————" + "\033[0m")
 
 
+# We'll ask the user how they'd like view all to be ordered
+def choose_sort_mode() -> Union[str, None]:
+    for key in SORT_MODES:
+        print("►", key, "-", SORT_MODES[key])
+
+    sort_mode = input("How would you like the tasks sorted? (press Enter for file order): ").lower()
+    if not sort_mode:
+        return "f"
+
+    if sort_mode not in SORT_MODES:
+        print("Invalid selection! Returning to Main Menu...")
+        return None
+
+    return sort_mode
+
+
+# Dates that can't be read are sorted to the end rather than stopping the sort
+def parse_sort_date(date_string: str) -> datetime:
+    try:
+        return datetime.strptime(date_string, "%d %b %Y")
+    except ValueError:
+        return datetime.max
+
+
+# Returns the key used to sort (task number, task) pairs for each sort mode
+# the task number is always the last part of the key so tasks that tie keep their file order
+def task_sort_key(sort_mode: str):
+    match sort_mode:
+        case "d":
+            return lambda numbered: (parse_sort_date(numbered[1].due_date), numbered[0])
+        case "a":
+            return lambda numbered: (numbered[1].assigned_to, parse_sort_date(numbered[1].due_date), numbered[0])
+        case "t":
+            return lambda numbered: (parse_sort_date(numbered[1].date_assigned), numbered[0])
+        case _:
+            return lambda numbered: numbered[0]
+
+
+# A rough guess at how much memory a (task number, task) pair takes while we hold it in a run
+# we count the tuple, the Task, its attributes and their strings rather than just the length of its line
+def estimate_task_size(task_number: int, task: Task) -> int:
+    return sys.getsizeof((task_number, task)) + sys.getsizeof(task_number) + sys.getsizeof(task) \
+        + sys.getsizeof(vars(task)) + sum(sys.getsizeof(value) for value in vars(task).values())
+
+
+# Sorts one run of tasks and spills it to a temporary file in run_dir, each line is the task number
+# followed by the task in the usual tasks.txt format. The file is closed straight away so we don't
+# hold one file open per run
+def write_sorted_run(run: list, sort_key, run_dir: str) -> str:
+    run.sort(key=sort_key)
+    return write_run(run, run_dir)
+
+
+# Writes (task number, task) pairs that are already in order to a new run file and returns its path
+def write_run(numbered_tasks, run_dir: str) -> str:
+    run_fd, run_path = tempfile.mkstemp(dir=run_dir, suffix=".run")
+    with os.fdopen(run_fd, "w", encoding="utf-8") as run_file:
+        run_file.writelines(f"{task_number}, {format_task_line(task)}\n" for task_number, task in numbered_tasks)
+    return run_path
+
+
+# Streams a spilled run back in as (task number, task) pairs, the file is only open while we read it
+def read_sorted_run(run_path: str):
+    with open(run_path, "r", encoding="utf-8") as run_file:
+        for line in run_file:
+            task_number, task_line = line.split(", ", 1)
+            yield int(task_number), parse_task_line(task_line)
+
+
+# Merges a group of runs into one bigger run and deletes the ones it merged
+def merge_runs(run_paths: list[str], sort_key, run_dir: str) -> str:
+    merged_path = write_run(heapq.merge(*[read_sorted_run(run_path) for run_path in run_paths], key=sort_key),
+                            run_dir)
+    for run_path in run_paths:
+        os.remove(run_path)
+    return merged_path
+
+
+# This is an external merge sort so we can sort task files far bigger than memory
+# We read tasks in runs of roughly memory_budget bytes (see estimate_task_size()), sort each run and spill it
+# to a temp file. A merge opens every run it reads, so while there are more than SORT_MERGE_WIDTH runs we
+# merge them in groups of that many first, which keeps us well under the open file limit.
+# Then heapq.merge() does a k-way merge of what's left, handing back one (task number, task) pair at a time
+# so the result can go straight into view_all(). If everything fits in one run we never touch the disk
+def external_sort_tasks(tasks_file_path: str, sort_mode: str, memory_budget: Union[int, None] = None):
+    if memory_budget is None:
+        memory_budget = SORT_MEMORY_BUDGET
+
+    sort_key = task_sort_key(sort_mode)
+    run_dir = None
+    run_paths = []
+    run = []
+    run_size = 0
+
+    try:
+        for task_number, task in enumerate(iter_tasks(tasks_file_path)):
+            run.append((task_number, task))
+            run_size += estimate_task_size(task_number, task)
+
+            if run_size >= memory_budget:
+                if run_dir is None:
+                    run_dir = tempfile.TemporaryDirectory(prefix="task-sort-")
+                run_paths.append(write_sorted_run(run, sort_key, run_dir.name))
+                run = []
+                run_size = 0
+
+        if not run_paths:
+            run.sort(key=sort_key)
+            yield from run
+            return
+
+        if run:
+            run_paths.append(write_sorted_run(run, sort_key, run_dir.name))
+            run = []
+
+        while len(run_paths) > SORT_MERGE_WIDTH:
+            run_paths = [merge_runs(run_paths[i:i + SORT_MERGE_WIDTH], sort_key, run_dir.name)
+                         for i in range(0, len(run_paths), SORT_MERGE_WIDTH)]
+
+        yield from heapq.merge(*[read_sorted_run(run_path) for run_path in run_paths], key=sort_key)
+    finally:
+        # Removes the run files along with the folder
+        if run_dir is not None:
+            run_dir.cleanup()
+
+
+# We'll turn a single line of tasks.txt into a Task object
+# The user name and the last three fields (dates and complete) never contain ", " so we split
+# those off from either end first, this way a comma in the description no longer shifts every field along
+def parse_task_line(line: str) -> Union[Task, None]:
+    line = line.rstrip("\r\n")
+    head = line.split(", ", 1)
+    tail = head[-1].rsplit(", ", 3)
+    middle = tail[0].split(", ", 1)
+
+    if len(head) < 2 or len(tail) < 4 or len(middle) < 2:
+        return None
+
+    return Task(head[0], middle[0], middle[1], tail[1], tail[2], tail[3])
+
+
+# The reverse of the above, we'll use it whenever we write a task back to the file
+def format_task_line(task: Task) -> str:
+    return f"{task.assigned_to}, {task.task}, {task.task_description}, " \
+           f"{task.date_assigned}, {task.due_date}, {task.complete}"
+
+
 # We'll load tasks to a list of task objects
 # We'll use the list created by this function in our other functions
-def load_tasks(tasks_file_path: str) -> Union[list[Task], None]:
+# The whole file is read the same way as a tail from offset 0, so a line that can't be read is skipped
+# (with a warning) here just like it is when it's appended later on
+def load_tasks(tasks_file_path: str) -> list[Task]:
     try:
-        with open(tasks_file_path, "r", encoding="utf-8") as read_tasks:
-            # Create an empty outer list to put our other lists in
-            tasks_list = []
-
-            for line in read_tasks:
-                # Strip newline chars & split the line by ", " store result to list
-                line = line.strip("\n")
-                tasks_sections = line.split(", ")
-                # Append the above list to the outer list
-                try:
-                    task = Task(tasks_sections[0], tasks_sections[1],
-                                tasks_sections[2], tasks_sections[3], tasks_sections[4], tasks_sections[5])
-                    tasks_list.append(task)
-                except IndexError:
-                    print("\033[91m" + "\033[1m" + "The file looks like it's been tampered with, "
-                                                   "please check or re-download, the tasks.txt file" + "\033[00m")
-                    return
+        with open(tasks_file_path, "rb") as tasks_file:
+            tasks_list, offset = read_task_lines(tasks_file, tasks_file_path)
 
+            # Now we've read to the end of the file we'll remember where that was
+            remember_task_file(tasks_file_path, os.fstat(tasks_file.fileno()).st_ino, offset)
             return tasks_list
     except FileNotFoundError:
         print("\033[91m" + "\033[1m" + "STOP!" + "\033[00m")
@@ -304,30 +628,184 @@ def load_tasks(tasks_file_path: str) -> Union[list[Task], None]:
         exit()
 
 
+# Unlike load_tasks this generator hands back one task at a time, so we never hold the whole
+# file in memory. Lines that can't be parsed are skipped rather than stopping the read
+def iter_tasks(tasks_file_path: str):
+    with open(tasks_file_path, "r", encoding="utf-8") as read_tasks:
+        for line in read_tasks:
+            if not line.strip():
+                continue
+
+            task = parse_task_line(line)
+            if task is not None:
+                yield task
+
+
+# We'll keep track of where we're up to in a tasks file in task_file_positions
+def remember_task_file(tasks_file_path: str, inode: int, offset: int) -> None:
+    task_file_positions[tasks_file_path] = TaskFilePosition(inode, offset)
+
+
+# Reads the tasks from the current position of an open (binary) tasks file to the end
+# and returns them with the offset we got up to
+# add_task writes the newline before each task rather than after, so the last line usually has no newline.
+# We only take that last line if it's a whole task, otherwise it may still be being written and we'll
+# pick it up next time
+def read_task_lines(tasks_file, tasks_file_path: str) -> tuple[list[Task], int]:
+    new_tasks = []
+    skipped_lines = 0
+    offset = tasks_file.tell()
+
+    for raw_line in tasks_file:
+        line_finished = raw_line.endswith(b"\n")
+        try:
+            line = raw_line.decode("utf-8")
+        except UnicodeDecodeError:
+            line = ""
+
+        # Blank lines can be left behind when add_task appends after save_tasks, we'll skip them
+        if line_finished and not line.strip():
+            offset += len(raw_line)
+            continue
+
+        task = parse_task_line(line)
+        if not line_finished and (task is None or task.complete not in ("Yes", "No")):
+            break
+
+        # A finished line that can't be parsed is skipped so it doesn't hold up the lines after it
+        if task is None:
+            skipped_lines += 1
+        else:
+            new_tasks.append(task)
+        offset += len(raw_line)
+
+    if skipped_lines:
+        print("\033[91m" + "\033[1m" + f"Skipped {skipped_lines} line(s) of {tasks_file_path} that couldn't be "
+              "read, they'll be left out the next time the file is saved" + "\033[00m")
+
+    return new_tasks, offset
+
+
+# Reads the tasks added to the file after offset and returns them with the new offset
+def read_task_tail(tasks_file_path: str, offset: int) -> tuple[list[Task], int]:
+    with open(tasks_file_path, "rb") as tasks_file:
+        tasks_file.seek(offset)
+        return read_task_lines(tasks_file, tasks_file_path)
+
+
+# We'll call this every time we come back to the main menu to pick up tasks written by other sessions
+# Checking the file with os.stat is cheap, if it has grown we only parse the new tail and add it
+# to the tasks list. We only read the whole file again if it was truncated or replaced
+def refresh_tasks(tasks_list: list[Task], tasks_file_path: str) -> list[Task]:
+    # While one of our own saves is still waiting the background writer will pick up anything
+    # appended to the file (see merge_file_changes()) before it writes, so we leave it to that
+    if task_writer.is_pending(tasks_file_path):
+        return tasks_list
+
+    try:
+        file_stat = os.stat(tasks_file_path)
+    except FileNotFoundError:
+        # The file may be in the middle of being replaced, we'll try again next time
+        return tasks_list
+
+    position = task_file_positions.get(tasks_file_path)
+
+    if position is None or file_stat.st_ino != position.inode or file_stat.st_size < position.offset:
+        return load_tasks(tasks_file_path)
+
+    if file_stat.st_size == position.offset:
+        return tasks_list
+
+    try:
+        new_tasks, position.offset = read_task_tail(tasks_file_path, position.offset)
+    except FileNotFoundError:
+        return tasks_list
+
+    tasks_list.extend(new_tasks)
+    return tasks_list
+
+
+# The background writer calls this just before it rewrites a tasks file. Another session or an import
+# may have appended to the file since we last read it, so we add those tasks to our list first rather
+# than writing over them. If the file was truncated or replaced we can't tell which of our edits still
+# apply, so we take the file as it is, let the user know, and return False so nothing gets written
+def merge_file_changes(tasks_list: list[Task], tasks_path: str) -> bool:
+    position = task_file_positions.get(tasks_path)
+    try:
+        file_stat = os.stat(tasks_path)
+    except FileNotFoundError:
+        return True
+
+    if position is None:
+        return True
+
+    if file_stat.st_ino != position.inode or file_stat.st_size < position.offset:
+        tasks_list[:] = load_tasks(tasks_path)
+        print("\033[91m" + "\033[1m" + f"{tasks_path} was replaced by another session, your last edit "
+              "couldn't be saved... Please make it again" + "\033[00m")
+        return False
+
+    if file_stat.st_size > position.offset:
+        new_tasks, position.offset = read_task_tail(tasks_path, position.offset)
+        tasks_list.extend(new_tasks)
+
+    return True
+
+
+# We write to a temporary file next to the real one and then rename it over the top, the rename is atomic
+# so anyone reading the file sees either the old one or the new one, never a half written one
+# Returns the stat of the new file, errors are left to the caller to handle
+def write_lines_atomically(file_path: str, lines) -> os.stat_result:
+    temp_path = None
+    try:
+        temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)),
+                                              prefix="." + os.path.basename(file_path) + "-", suffix=".tmp")
+        with os.fdopen(temp_fd, "w", encoding="utf-8") as temp_file:
+            temp_file.writelines(lines)
+
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+            file_stat = os.fstat(temp_file.fileno())
+
+        # mkstemp makes the file readable only by us, so we'll give it the permissions the old file had
+        # otherwise other sessions could lose access to the file after our first save
+        if os.path.exists(file_path):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+
+        os.replace(temp_path, file_path)
+        return file_stat
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
 # This function will save the tasks to the tasks.txt file and load_tasks()
-# can be called to load from file
-def save_tasks(tasks_list: list[Task], tasks_path: str):
+# can be called to load from file. It returns True if the tasks were saved
+def save_tasks(tasks_list: list[Task], tasks_path: str) -> bool:
     try:
-        with open(tasks_path, "w", encoding="utf-8") as tasks_file:
-            for task in tasks_list:
-                tasks_file.write(f"{task.assigned_to}, {task.task}, "
-                                 f"{task.task_description}, {task.date_assigned}, {task.due_date}, {task.complete}\n")
+        file_stat = write_lines_atomically(tasks_path, (format_task_line(task) + "\n" for task in tasks_list))
+        # We've just rewritten the file ourselves so we don't want to read any of it back in
+        remember_task_file(tasks_path, file_stat.st_ino, file_stat.st_size)
+        return True
     except PermissionError:
         print("You do not have permission to access the file... Is the file open? Please"
               "close it and try again")
-        return
+        return False
     except IOError:
         print("There was an error reading/writing the file")
-        return
+        return False
     except Exception:
         print("There's been a general problem... please check your system and try again")
-        return
+        return False
 
 
 # This function allows the user to view and edit their own tasks
 # This function provides a sub menu to the user with options on how they can edit the
 # task
-def view_mine(tasks_list: list[Task], task_path: str, users_dict: dict, logged_in_user: str):
+# Occurrences of the user's recurring tasks around today are listed too, numbered r1, r2 and so on
+# they only become real tasks in tasks.txt once they're edited
+def view_mine(tasks_list: list[Task], task_path: str, users_dict: dict, logged_in_user: str,
+              recurring_tasks: Union[list[RecurringTask], None] = None):
     print()
     print("\033[1m" + "———— View My Tasks ————" + "\033[0m")
     # TODO Write some comments
@@ -341,9 +819,33 @@ def view_mine(tasks_list: list[Task], task_path: str, users_dict: dict, logged_i
             # the number later we'll minus 1
             print(YELLOW + BOLD + f"Task Number: {tasks_list.index(task)}" + ESCAPE)
             print(task)
+
+    # We only expand the occurrences that fall inside the window we're showing, plus the oldest few
+    # overdue ones from before it so they can still be completed
+    my_occurrences = {}
+    window_start, window_end = recurring_window(date.today())
+    for template in recurring_tasks or []:
+        if template.assigned_to != logged_in_user:
+            continue
+
+        before_window = window_start - timedelta(days=1)
+        older_count = count_open_occurrences(template, template.get_start_date(), before_window)
+        older_days = list(itertools.islice(open_occurrences(template, template.get_start_date(), before_window),
+                                           RECURRING_OVERDUE_SHOWN))
+
+        for occurrence_day in older_days + list(open_occurrences(template, window_start, window_end)):
+            occurrence_number = f"r{len(my_occurrences) + 1}"
+            my_occurrences[occurrence_number] = (template, occurrence_day, occurrence_task(template, occurrence_day))
+            print("—————————————————————————————————————————————————————————————————————")
+            print(YELLOW + BOLD + f"Task Number: {occurrence_number} (recurs {template.rule})" + ESCAPE)
+            print(my_occurrences[occurrence_number][2])
+
+        if older_count > len(older_days):
+            print("\033[91m" + "\033[1m" + f"{older_count - len(older_days)} more overdue occurrences of "
+                  f"{template.task} will show once these are done" + "\033[00m")
     print("——————————————————————————  END OF TASKS —————————————————————————————")
 
-    if len(my_tasks) < 1:
+    if len(my_tasks) + len(my_occurrences) < 1:
         print("\033[91m" + "\033[1m" + "You have no tasks assigned!" + "\033[00m")
         print()
         return
@@ -360,12 +862,22 @@ def view_mine(tasks_list: list[Task], task_path: str, users_dict: dict, logged_i
         if return_to_menu(task_selection) is None:
             return
 
-        if check_number(task_selection) is None:
+        # selected_occurrence is only set when the user picks a recurring occurrence that isn't a real task yet
+        # it holds the recurring task and the date of the occurrence
+        selected_task = None
+        selected_occurrence = None
+
+        if task_selection.lower() in my_occurrences:
+            template, occurrence_day, selected_task = my_occurrences[task_selection.lower()]
+            selected_occurrence = (template, occurrence_day)
+        elif check_number(task_selection) is None:
             print("...Please try again")
             continue
-
-        if int(task_selection) in range(len(tasks_list)) \
+        elif int(task_selection) in range(len(tasks_list)) \
                 and tasks_list[int(task_selection)].assigned_to == logged_in_user:
+            selected_task = tasks_list[int(task_selection)]
+
+        if selected_task is not None:
             while True:
                 print("\033[1m" + "———— View Mine Sub Menu ————" + "\033[0m")
 
@@ -382,21 +894,23 @@ q or -1 to go back to Main Menu: """)
                     case "1":
                         task_complete = input('Is the task complete? Type "Yes" or "No": ')
                         if task_complete.lower() == "yes" or task_complete.lower() == "no":
-                            tasks_list[int(task_selection)].complete = task_complete.capitalize()
-                            print(tasks_list[int(task_selection)])
+                            selected_task.complete = task_complete.capitalize()
+                            print(selected_task)
 
-                            save_tasks(tasks_list, task_path)
+                            selected_occurrence = save_task_edit(tasks_list, task_path, selected_task,
+                                                                 selected_occurrence, recurring_tasks)
 
                         else:
                             print("Sorry it seems you've typed the input incorrectly..."
                                   "Returning to View Mine Sub Menu")
 
                     case "2":
-                        if tasks_list[int(task_selection)].complete == "No":
+                        if selected_task.complete == "No":
                             assign_new_user = input("Please enter the user you'd like to re-assign the task to: ")
                             if assign_new_user in users_dict:
-                                tasks_list[int(task_selection)].assigned_to = assign_new_user.lower()
-                                save_tasks(tasks_list, task_path)
+                                selected_task.assigned_to = assign_new_user.lower()
+                                save_task_edit(tasks_list, task_path, selected_task, selected_occurrence,
+                                               recurring_tasks)
 
                                 print("The user for the task has been reassigned... Returning to Main Menu")
                                 return
@@ -408,12 +922,13 @@ q or -1 to go back to Main Menu: """)
                                                            "Returning to View Mine Sub Menu" + "\033[00m")
 
                     case "3":
-                        if tasks_list[int(task_selection)].complete == "No":
+                        if selected_task.complete == "No":
                             new_due_date = check_date(input("Please input the new date (example format 10 Oct 2019): "))
 
                             if new_due_date is not None:
-                                tasks_list[int(task_selection)].due_date = str(new_due_date.strftime("%d %b %Y"))
-                                save_tasks(tasks_list, task_path)
+                                selected_task.due_date = str(new_due_date.strftime("%d %b %Y"))
+                                save_task_edit(tasks_list, task_path, selected_task, selected_occurrence,
+                                               recurring_tasks)
 
                                 print("The due date for the task has been reassigned... Returning to Main Menu")
                                 return
@@ -432,19 +947,287 @@ q or -1 to go back to Main Menu: """)
             print("You've made an incorrect selection... Please try again")
 
 
+# Recurring tasks live in recurring.txt next to the project's tasks.txt
+def recurring_tasks_path(tasks_file_path: str) -> str:
+    return os.path.join(os.path.dirname(tasks_file_path), "recurring.txt")
+
+
+# Lines in recurring.txt look like tasks.txt ones:
+# user, title, description, start date, rule, interval, materialized dates separated by ; (or - for none)
+# so like parse_task_line() we split the fixed fields off either end
+def parse_recurring_line(line: str) -> Union[RecurringTask, None]:
+    line = line.rstrip("\r\n")
+    head = line.split(", ", 1)
+    tail = head[-1].rsplit(", ", 4)
+    middle = tail[0].split(", ", 1)
+
+    if len(head) < 2 or len(tail) < 5 or len(middle) < 2 or tail[2] not in RECURRING_RULES:
+        return None
+
+    try:
+        interval = int(tail[3])
+        datetime.strptime(tail[1], "%d %b %Y")
+    except ValueError:
+        return None
+
+    if interval < 1:
+        return None
+
+    materialized = set() if tail[4] == "-" else set(tail[4].split(";"))
+    return RecurringTask(head[0], middle[0], middle[1], tail[1], tail[2], interval, materialized)
+
+
+def format_recurring_line(template: RecurringTask) -> str:
+    materialized = ";".join(sorted(template.materialized, key=parse_sort_date)) or "-"
+    return f"{template.assigned_to}, {template.task}, {template.task_description}, " \
+           f"{template.start_date}, {template.rule}, {template.interval}, {materialized}"
+
+
+# A project doesn't need a recurring.txt, no file just means no recurring tasks
+def load_recurring_tasks(recurring_path: str) -> list[RecurringTask]:
+    recurring_tasks = []
+    if not os.path.isfile(recurring_path):
+        return recurring_tasks
+
+    with open(recurring_path, "r", encoding="utf-8") as read_recurring:
+        for line in read_recurring:
+            if not line.strip():
+                continue
+
+            template = parse_recurring_line(line)
+            if template is None:
+                print("\033[91m" + "\033[1m" + "Skipping a recurring task that couldn't be read in "
+                      + recurring_path + "\033[00m")
+                continue
+
+            recurring_tasks.append(template)
+
+    return recurring_tasks
+
+
+# There's one line per recurring task so this file stays small, we just rewrite it the same way as tasks.txt
+def save_recurring_tasks(recurring_tasks: list[RecurringTask], recurring_path: str):
+    try:
+        write_lines_atomically(recurring_path, (format_recurring_line(template) + "\n"
+                                                for template in recurring_tasks))
+    except PermissionError:
+        print("You do not have permission to access the file... Is the file open? Please"
+              "close it and try again")
+        return
+    except IOError:
+        print("There was an error reading/writing the file")
+        return
+
+
+# The date of occurrence number n (the first one is 0)
+# Monthly tasks that start on the 29th-31st fall on the last day of shorter months
+def occurrence_date(template: RecurringTask, n: int) -> date:
+    start = template.get_start_date()
+
+    match template.rule:
+        case "daily":
+            return start + timedelta(days=n * template.interval)
+        case "weekly":
+            return start + timedelta(weeks=n * template.interval)
+        case _:
+            months = start.month - 1 + n * template.interval
+            year = start.year + months // 12
+            month = months % 12 + 1
+            return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+# How many months from the start month to the month of the given day
+def months_since_start(template: RecurringTask, day: date) -> int:
+    start = template.get_start_date()
+    return (day.year - start.year) * 12 + day.month - start.month
+
+
+# The number of the first occurrence on or after the given day, worked out without stepping through them
+def first_occurrence_index(template: RecurringTask, on_or_after: date) -> int:
+    start = template.get_start_date()
+    if on_or_after <= start:
+        return 0
+
+    if template.rule == "monthly":
+        n = -(-months_since_start(template, on_or_after) // template.interval)
+        if occurrence_date(template, n) < on_or_after:
+            n += 1
+        return n
+
+    step = template.interval * (7 if template.rule == "weekly" else 1)
+    return -(-(on_or_after - start).days // step)
+
+
+# The number of the last occurrence on or before the given day, -1 if it's before the first occurrence
+def last_occurrence_index(template: RecurringTask, on_or_before: date) -> int:
+    start = template.get_start_date()
+    if on_or_before < start:
+        return -1
+
+    if template.rule == "monthly":
+        n = months_since_start(template, on_or_before) // template.interval
+        if occurrence_date(template, n) > on_or_before:
+            n -= 1
+        return n
+
+    step = template.interval * (7 if template.rule == "weekly" else 1)
+    return (on_or_before - start).days // step
+
+
+# How many times the task comes around between the two days (inclusive), this is simple arithmetic
+# so it costs the same whether the window holds 1 occurrence or 10,000
+def count_occurrences(template: RecurringTask, window_start: date, window_end: date) -> int:
+    return max(0, last_occurrence_index(template, window_end) - first_occurrence_index(template, window_start) + 1)
+
+
+# Hands back the occurrence dates between the two days one at a time, so we only ever create the ones we show
+def iter_occurrences(template: RecurringTask, window_start: date, window_end: date):
+    for n in range(first_occurrence_index(template, window_start), last_occurrence_index(template, window_end) + 1):
+        yield occurrence_date(template, n)
+
+
+# Builds the Task for an occurrence, it isn't added to the tasks list until someone edits it
+def occurrence_task(template: RecurringTask, occurrence_day: str) -> Task:
+    return Task(template.assigned_to, template.task, template.task_description, template.start_date,
+                occurrence_day, "No")
+
+
+# The days view my tasks shows every occurrence for. Older occurrences that haven't been done are shown
+# too (the oldest RECURRING_OVERDUE_SHOWN of them) and reports count all of them as overdue
+def recurring_window(today: date) -> tuple[date, date]:
+    return today - timedelta(days=RECURRING_VIEW_PAST_DAYS), today + timedelta(days=RECURRING_VIEW_DAYS)
+
+
+# Hands back the dates of the occurrences between the two days that aren't real tasks yet, one at a time
+def open_occurrences(template: RecurringTask, window_start: date, window_end: date):
+    for occurrence_day in iter_occurrences(template, window_start, window_end):
+        occurrence_day = occurrence_day.strftime("%d %b %Y")
+        if occurrence_day not in template.materialized:
+            yield occurrence_day
+
+
+# Counts what open_occurrences() would hand back without going through them: the arithmetic count
+# less the materialized ones in the same days
+def count_open_occurrences(template: RecurringTask, window_start: date, window_end: date) -> int:
+    return count_occurrences(template, window_start, window_end) \
+        - sum(1 for day in template.materialized if window_start <= parse_sort_date(day).date() <= window_end)
+
+
+# Used by reports, returns how many occurrences are open (not yet real tasks) and how many of those are overdue
+# Like one-off tasks an occurrence stays overdue until it's done, so we count from the start date up to
+# the end of recurring_window(). Materialized ones are left out as they're counted with the rest of the tasks
+def recurring_counts(template: RecurringTask, today: date) -> tuple[int, int]:
+    start = template.get_start_date()
+    window_end = recurring_window(today)[1]
+
+    open_count = count_open_occurrences(template, start, window_end)
+    overdue_count = count_open_occurrences(template, start, today - timedelta(days=1))
+
+    return open_count, overdue_count
+
+
+# Reports add this line when there are recurring tasks so it's clear which occurrences were counted
+def recurring_window_line(today: date) -> str:
+    window_end = recurring_window(today)[1]
+    return f"Recurring tasks counted from their start date to {window_end.strftime('%d %b %Y')}\n"
+
+
+# view_mine() calls this to save an edit, if the task is a recurring occurrence this is when it becomes
+# a real task: we add it to the tasks list and note its date on the recurring task so it isn't shown twice
+# The task has to be safely in tasks.txt before we note the date, otherwise if we were stopped in between
+# (or the save failed) the occurrence would vanish, so for occurrences we wait for the save to finish.
+# Returns the occurrence that's still waiting to become a real task, which is None once it has
+def save_task_edit(tasks_list: list[Task], task_path: str, edited_task: Task,
+                   selected_occurrence: Union[tuple, None],
+                   recurring_tasks: Union[list[RecurringTask], None]) -> Union[tuple, None]:
+    if selected_occurrence is None:
+        task_writer.save(tasks_list, task_path)
+        return None
+
+    template, occurrence_day = selected_occurrence
+    tasks_list.append(edited_task)
+    task_writer.save(tasks_list, task_path)
+    task_writer.flush()
+
+    if task_writer.save_failed(task_path):
+        # Take it back out (unless the list was reloaded without it) so it's still shown as an occurrence
+        for task_number in range(len(tasks_list) - 1, -1, -1):
+            if tasks_list[task_number] is edited_task:
+                del tasks_list[task_number]
+                break
+        print("\033[91m" + "\033[1m" + "The recurring task couldn't be saved... Please try again" + "\033[00m")
+        return selected_occurrence
+
+    template.materialized.add(occurrence_day)
+    save_recurring_tasks(recurring_tasks, recurring_tasks_path(task_path))
+    return None
+
+
+# Add a recurring task, it's written once to recurring.txt however many times it comes around
+def add_recurring_task(users_dict: dict, recurring_tasks: list[RecurringTask], tasks_file_path: str):
+    print("\033[1m" + "———— Add a Recurring Task ————" + "\033[0m")
+
+    while True:
+        user_to_assign = input("Which user do you want to assign the task to? "
+                               "(type q to go back to Main Menu): ")
+
+        if return_to_menu(user_to_assign) is None:
+            return
+
+        if not check_task_field(user_to_assign, "username"):
+            continue
+
+        if user_to_assign in users_dict:
+            break
+
+        print()
+        print("Sorry the username has NOT been found... Please Try again")
+
+    while True:
+        task_title = input("Please input the task title: ")
+        if check_task_field(task_title, "task title"):
+            break
+    task_description = input("Please write a description of the task: ")
+
+    while True:
+        start_date = check_date(input("When is the task first due (for example: 10 Oct 2022): "))
+        if start_date is not None:
+            break
+
+    while True:
+        rule = input(f"How often does it repeat? ({', '.join(RECURRING_RULES)}): ").lower()
+        if rule in RECURRING_RULES:
+            break
+        print("Sorry that isn't one of the options... Please try again")
+
+    while True:
+        interval = check_number(input(f"Every how many {RECURRING_RULES[rule]}? (for example: 1): "))
+        if interval is not None and interval > 0:
+            break
+        print("...Please try again")
+
+    recurring_tasks.append(RecurringTask(user_to_assign, task_title, task_description,
+                                         start_date.strftime("%d %b %Y"), rule, interval))
+    save_recurring_tasks(recurring_tasks, recurring_tasks_path(tasks_file_path))
+
+    print()
+    print("———— Recurring task has been successfully added! ————")
+
+
 # in display stats we'll first call the generate functions for tasks and users
 # this means we'll always get the latest stats when choosing the ds option from the menu
 # there could be an issue, so we'll handle that present a message to the user
 # and return without displaying any stats
-def display_stats(dict_of_users: dict[str], list_of_tasks: list[Task]):
+def display_stats(dict_of_users: dict[str], list_of_tasks: list[Task],
+                  recurring_tasks: Union[list[RecurringTask], None] = None):
     try:
-        gen_task_report(list_of_tasks)
+        gen_task_report(list_of_tasks, recurring_tasks)
     except Exception:
         print("Something is stopping the tasks overview file being written!")
         return
 
     try:
-        gen_user_report(dict_of_users, list_of_tasks)
+        gen_user_report(dict_of_users, list_of_tasks, recurring_tasks)
     except Exception:
         print("Something is stopping the users overview file being written!")
         return
@@ -514,7 +1297,8 @@ def percent_calc(a: int, b: int) -> float:
 
 
 # This function generates the tasks_overview.txt
-def gen_task_report(list_of_tasks: list[Task]) -> None:
+# Recurring tasks are added in using recurring_counts() so we never have to create their occurrences
+def gen_task_report(list_of_tasks: list[Task], recurring_tasks: Union[list[RecurringTask], None] = None) -> None:
     # Total number of tasks
     total_task_num = len(list_of_tasks)
 
@@ -538,6 +1322,13 @@ def gen_task_report(list_of_tasks: list[Task]) -> None:
         if today > task_due.date():
             overdue_count += 1
 
+    # Open recurring occurrences are incomplete, and overdue once their date has passed
+    for template in recurring_tasks or []:
+        open_count, overdue_occurrences = recurring_counts(template, today)
+        total_task_num += open_count
+        count_incomplete += open_count
+        overdue_count += overdue_occurrences
+
     # Percentage incomplete
     incomplete_percent = percent_calc(count_incomplete, total_task_num)
     overdue_percent = percent_calc(overdue_count, total_task_num)
@@ -550,6 +1341,7 @@ def gen_task_report(list_of_tasks: list[Task]) -> None:
                      f"Total Overdue:                 {overdue_count}\n"
                      f"Percent Incomplete:            {incomplete_percent}%\n"
                      f"Percent Overdue:               {overdue_percent}%\n"
+                     + (recurring_window_line(today) if recurring_tasks else "") +
                      f"——————————————————————————————————————————————")
 
     # Write task_overview.txt file
@@ -568,7 +1360,8 @@ def gen_task_report(list_of_tasks: list[Task]) -> None:
 
 
 # This function generates the users_overview.txt
-def gen_user_report(dict_of_users: dict[str], list_of_tasks: list[Task]) -> None:
+def gen_user_report(dict_of_users: dict[str], list_of_tasks: list[Task],
+                    recurring_tasks: Union[list[RecurringTask], None] = None) -> None:
     # Total number of user
     num_of_users = len(dict_of_users)
 
@@ -576,11 +1369,17 @@ def gen_user_report(dict_of_users: dict[str], list_of_tasks: list[Task]) -> None
     total_task_num = len(list_of_tasks)
     today = date.today()
 
+    # We'll work out the recurring counts once and add each user's share below
+    recurring_task_counts = [(template, recurring_counts(template, today)) for template in recurring_tasks or []]
+    total_task_num += sum(open_count for _, (open_count, _) in recurring_task_counts)
+
     users_stats_string = ""
 
     users_stats_string += f"———————————————— User Overview ————————————————\n"
+    if recurring_tasks:
+        users_stats_string += recurring_window_line(today) + "\n"
 
-    for user in credentials_dict:
+    for user in dict_of_users:
         user_details = ""
         user_header = f"• {str(user).capitalize()} •\n"
         task_count = 0
@@ -598,6 +1397,11 @@ def gen_user_report(dict_of_users: dict[str], list_of_tasks: list[Task]) -> None
                 if today > task_due.date():
                     overdue_tasks_count += 1
 
+        for template, (open_count, overdue_occurrences) in recurring_task_counts:
+            if str(user) == template.assigned_to:
+                task_count += open_count
+                overdue_tasks_count += overdue_occurrences
+
         percentage_assigned = percent_calc(task_count, total_task_num)
         percent_user_completed = percent_calc(complete_task_count, task_count)
         percent_left = 100 - (percent_calc(complete_task_count, task_count))
@@ -628,6 +1432,283 @@ def gen_user_report(dict_of_users: dict[str], list_of_tasks: list[Task]) -> None
         return
 
 
+# Writes out one batch of export rows, csv rows go through the csv writer so they're quoted properly
+# and jsonl rows are already finished lines
+def write_export_chunk(export_file, csv_writer, rows: list) -> None:
+    if csv_writer is not None:
+        csv_writer.writerows(rows)
+    else:
+        export_file.writelines(rows)
+
+
+# If an export fails part way we'll remove what was written so far, a half written export
+# could easily be mistaken for a complete one
+def remove_partial_export(export_path: str) -> None:
+    try:
+        os.remove(export_path)
+    except OSError:
+        pass
+
+
+# This function streams tasks.txt into a csv or jsonl file for other tools to use
+# We read the tasks one at a time and write them in batches of chunk_size so memory use stays the same
+# no matter how big the file is. task_filter is a dict of field names to the value they must match
+# and export_fields picks which fields (and in which order) end up in the export
+def export_tasks(tasks_file_path: str, export_path: str, export_format: str = "csv",
+                 export_fields: Union[list[str], None] = None, task_filter: Union[dict, None] = None,
+                 chunk_size: Union[int, None] = None, compress: bool = False) -> Union[int, None]:
+    task_fields = [task_field.name for task_field in fields(Task)]
+
+    if export_format not in EXPORT_FORMATS:
+        print(f"Sorry {export_format} is not a supported export format...")
+        return
+
+    if export_fields is None:
+        export_fields = task_fields
+
+    # An empty projection would write an empty header and a blank row for every task
+    if not export_fields:
+        print("Please choose at least one field to export...")
+        return
+
+    unknown_fields = [name for name in export_fields + list(task_filter or {}) if name not in task_fields]
+    if unknown_fields:
+        print(f"Sorry these fields don't exist on a task: {', '.join(unknown_fields)}")
+        return
+
+    if chunk_size is None:
+        chunk_size = EXPORT_CHUNK_SIZE
+
+    if compress and not export_path.endswith(".gz"):
+        export_path += ".gz"
+
+    # We'll check for the tasks file before creating the export, otherwise a missing tasks.txt
+    # would leave an empty export file behind
+    if not os.path.isfile(tasks_file_path):
+        print("Is the tasks.txt file present? Please look in your projects dir and try again")
+        return
+
+    export_file = None
+    export_count = 0
+    rows = []
+
+    try:
+        if compress:
+            export_file = gzip.open(export_path, "wt", encoding="utf-8", newline="")
+        else:
+            export_file = open(export_path, "w", encoding="utf-8", newline="")
+
+        with export_file:
+            csv_writer = None
+            if export_format == "csv":
+                csv_writer = csv.writer(export_file)
+                csv_writer.writerow(export_fields)
+
+            for task in iter_tasks(tasks_file_path):
+                if task_filter and any(getattr(task, name) != value for name, value in task_filter.items()):
+                    continue
+
+                if csv_writer is not None:
+                    rows.append([getattr(task, name) for name in export_fields])
+                else:
+                    rows.append(json.dumps({name: getattr(task, name) for name in export_fields}) + "\n")
+
+                # Once the batch is full we write it out and start a new one
+                if len(rows) >= chunk_size:
+                    write_export_chunk(export_file, csv_writer, rows)
+                    export_count += len(rows)
+                    rows = []
+
+            write_export_chunk(export_file, csv_writer, rows)
+            export_count += len(rows)
+    except FileNotFoundError:
+        print("Is the tasks.txt file present? Please look in your projects dir and try again")
+        if export_file is not None:
+            remove_partial_export(export_path)
+        return
+    except PermissionError:
+        print("\033[91m" + "\033[1m" + "The export file cannot be written... Is it open?" + "\033[0m")
+        if export_file is not None:
+            remove_partial_export(export_path)
+        return
+    except IOError:
+        print("\033[91m" + "\033[1m" + "The export file cannot be written" + "\033[0m")
+        if export_file is not None:
+            remove_partial_export(export_path)
+        return
+
+    return export_count
+
+
+# The export menu option, we'll ask the admin how they want the export and hand it to export_tasks()
+def export_menu(tasks_file_path: str):
+    print("\033[1m" + "———— Export Tasks ————" + "\033[0m")
+
+    export_format = input("Which format would you like, csv or jsonl? (or type q to go back to Main Menu): ").lower()
+    if return_to_menu(export_format) is None:
+        return
+
+    if export_format not in EXPORT_FORMATS:
+        print("Sorry that format isn't supported... Returning to Main Menu")
+        return
+
+    export_path = input(f"Please enter the file to export to (for example: tasks_export.{export_format}): ")
+    if not export_path:
+        export_path = f"tasks_export.{export_format}"
+
+    # An empty answer means we don't filter or project on that
+    task_filter = {}
+    filter_user = input("Only export tasks assigned to (leave blank for all users): ")
+    if filter_user:
+        task_filter["assigned_to"] = filter_user
+
+    filter_complete = input('Only export tasks that are complete, type "Yes" or "No" (leave blank for all): ')
+    if filter_complete.lower() in ("yes", "no"):
+        task_filter["complete"] = filter_complete.capitalize()
+
+    export_fields = None
+    chosen_fields = input("Which fields should be exported, separated by commas (leave blank for all): ")
+    if chosen_fields:
+        export_fields = [name.strip() for name in chosen_fields.split(",") if name.strip()]
+        if not export_fields:
+            print("Sorry no fields were given... Returning to Main Menu")
+            return
+
+    compress = input("Would you like the export gzip compressed? (y/n): ").lower() == "y"
+
+    export_count = export_tasks(tasks_file_path, export_path, export_format, export_fields, task_filter,
+                                compress=compress)
+    if export_count is not None:
+        print(GREEN + BOLD + f"{export_count} tasks exported!" + ESCAPE)
+
+
+# The default project is the tasks.txt we've always used, every other project gets its own folder
+def project_tasks_path(project_name: str) -> str:
+    if project_name == DEFAULT_PROJECT:
+        return "tasks.txt"
+    return os.path.join(PROJECTS_DIR, project_name, "tasks.txt")
+
+
+# Project names become folder names so we only allow plain names, anything like .. or a / could
+# point a project at another project's tasks file
+def check_project_name(project_name: str) -> bool:
+    if not project_name.replace("-", "").replace("_", "").isalnum():
+        print("Project names can only use letters, numbers, - and _")
+        return False
+    return True
+
+
+# Lists every project that has a tasks file on disk
+def list_projects() -> list[str]:
+    project_names = [DEFAULT_PROJECT]
+    if os.path.isdir(PROJECTS_DIR):
+        for project_name in sorted(os.listdir(PROJECTS_DIR)):
+            if project_name != DEFAULT_PROJECT and project_name.replace("-", "").replace("_", "").isalnum() \
+                    and os.path.isfile(project_tasks_path(project_name)):
+                project_names.append(project_name)
+    return project_names
+
+
+# A rough guess at how much memory a project's tasks take up. The size of the file is several times
+# smaller than the Task objects we build from it, so we measure a sample of tasks spread through the list
+# with estimate_task_size() and scale that up. Sampling keeps this quick however big the project is
+def project_size(project: Project) -> int:
+    if not project.tasks:
+        return 0
+
+    step = max(1, len(project.tasks) // PROJECT_SIZE_SAMPLE)
+    sample = project.tasks[::step]
+    sample_size = sum(estimate_task_size(task_number, task) for task_number, task in enumerate(sample))
+    return sample_size * len(project.tasks) // len(sample)
+
+
+# Returns the named project and makes it the most recently used one in project_cache
+# A project we already have loaded only gets the cheap refresh_tasks() check rather than a full parse
+def open_project(project_name: str) -> Union[Project, None]:
+    if not check_project_name(project_name):
+        return None
+
+    if project_name in project_cache:
+        project = project_cache[project_name]
+        project_cache.move_to_end(project_name)
+        project.tasks = refresh_tasks(project.tasks, project.tasks_path)
+        return project
+
+    tasks_path = project_tasks_path(project_name)
+    if not os.path.isfile(tasks_path):
+        print("\033[91m" + "\033[1m" + f"The project {project_name} doesn't exist!" + "\033[00m")
+        return None
+
+    project = Project(project_name, tasks_path, load_tasks(tasks_path), load_recurring_tasks(recurring_tasks_path(tasks_path)))
+    project_cache[project_name] = project
+    evict_projects()
+    return project
+
+
+# Makes the folder and an empty tasks file for a new project
+def create_project(project_name: str) -> bool:
+    if not check_project_name(project_name):
+        return False
+
+    tasks_path = project_tasks_path(project_name)
+    try:
+        os.makedirs(os.path.dirname(tasks_path), exist_ok=True)
+        with open(tasks_path, "a", encoding="utf-8"):
+            pass
+    except OSError:
+        print("\033[91m" + "\033[1m" + "The project folder cannot be created" + "\033[0m")
+        return False
+
+    return True
+
+
+# Drops the least recently used projects once we hold more than PROJECT_CACHE_SIZE of them or they
+# take up more than PROJECT_CACHE_BUDGET bytes. The active project is always the most recently used
+# so it's never dropped. Any saves still waiting for a dropped project are written first
+def evict_projects() -> None:
+    while len(project_cache) > 1 and (len(project_cache) > PROJECT_CACHE_SIZE or
+                                      sum(project_size(project) for project in project_cache.values())
+                                      > PROJECT_CACHE_BUDGET):
+        project_name, project = project_cache.popitem(last=False)
+
+        if task_writer.is_pending(project.tasks_path):
+            task_writer.flush()
+
+        task_file_positions.pop(project.tasks_path, None)
+
+
+# The switch project menu option, returns the project to switch to or None to stay where we are
+# only the admin can create new projects
+def switch_project_menu(user_obj: User) -> Union[Project, None]:
+    print("\033[1m" + "———— Switch Project ————" + "\033[0m")
+
+    for project_name in list_projects():
+        print("►", project_name)
+
+    project_name = input("Which project would you like to switch to? (or type q to go back to Main Menu): ")
+    if return_to_menu(project_name) is None:
+        return None
+
+    if not check_project_name(project_name):
+        print("Returning to Main Menu...")
+        return None
+
+    if project_name not in project_cache and not os.path.isfile(project_tasks_path(project_name)):
+        if not user_obj.is_admin:
+            print("Sorry that project doesn't exist... Returning to Main Menu")
+            return None
+
+        create_new = input(f"The project {project_name} doesn't exist, would you like to create it? (y/n): ")
+        if create_new.lower() != "y" or not create_project(project_name):
+            print("Returning to Main Menu...")
+            return None
+
+    project = open_project(project_name)
+    if project is not None:
+        print(GREEN + BOLD + f"Switched to project {project.name}!" + ESCAPE)
+    return project
+
+
 # -------- Global Variables --------
 # Styling
 BLUE = "\033[94m"
@@ -639,6 +1720,46 @@ CYAN = "\033[96m"
 PURPLE = "\033[35m"
 BOLD = "\033[1m"
 
+# Exporting - how many rows we'll hold in memory before writing them out
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_CHUNK_SIZE = 10000
+
+# Viewing - how many tasks we show before pausing, roughly how many bytes of tasks we'll sort in memory
+# before spilling a sorted run to a temp file, and the most runs we'll have open at once while merging
+PAGE_SIZE = 10
+SORT_MEMORY_BUDGET = 8 * 1024 * 1024
+SORT_MERGE_WIDTH = 64
+SORT_MODES = {
+    "f": "File order",
+    "d": "Due date",
+    "a": "Assignee then due date",
+    "t": "Date assigned"
+}
+
+# Saving - edits made within this many seconds of each other are written to the file together
+SAVE_COALESCE_WINDOW = 0.5
+
+# Recurring tasks - the rules we support (and what to call them when asking for the interval), how many
+# days either side of today view my tasks shows occurrences for, and how many older overdue occurrences
+# of each recurring task it shows as well
+RECURRING_RULES = {
+    "daily": "days",
+    "weekly": "weeks",
+    "monthly": "months"
+}
+RECURRING_VIEW_PAST_DAYS = 7
+RECURRING_VIEW_DAYS = 14
+RECURRING_OVERDUE_SHOWN = 5
+
+# Projects - where project folders live, and how many loaded projects (and roughly how many bytes of memory
+# their tasks take) we'll keep before dropping the least recently used. PROJECT_SIZE_SAMPLE is how many
+# tasks project_size() measures to make that guess
+DEFAULT_PROJECT = "default"
+PROJECTS_DIR = "projects"
+PROJECT_CACHE_SIZE = 8
+PROJECT_CACHE_BUDGET = 64 * 1024 * 1024
+PROJECT_SIZE_SAMPLE = 1000
+
 attempts = 3
 login_success = False
 user_match = False
@@ -646,133 +1767,174 @@ pass_match = False
 # We'll need to hold on to the username for the main loop
 logged_user_name = ""
 user_object = None
-tasks = []
+# The project the user is working in, its tasks are in active_project.tasks
+active_project = None
+# The loaded projects, least recently used first, see open_project()
+project_cache = OrderedDict()
+# The inode and how far we've read into each tasks file, see refresh_tasks()
+task_file_positions = {}
 
 # Menu dictionaries - note we have a regular user menu and an admin one that includes only the extra
 # options available to the admin
 # we'll use our display_menu() function to format displaying it to the user
 user_menu_dict = {
     "a": "Add a task",
+    "ar": "Add a recurring task",
     "va": "View all Tasks",
     "vm": "View my Tasks",
+    "p": "Switch project",
     "e": "Exit"
 }
 
 admin_menu_dict = {
     "r": "Register a user",
     "ds": "Display statistics",
-    "gr": "Generate reports"
+    "gr": "Generate reports",
+    "ex": "Export tasks"
 }
 
 # Here we'll create an empty menu that gets set once we understand the status of the user
 presented_menu = {}
 
-# Call open_and_list_users save it to variable credentials_list
-credentials_dict = open_users_to_dict("user.txt")
+# The background writer that view_mine() hands its saves to, it starts on the first save
+# atexit makes sure it finishes writing however the program exits, including Ctrl+C
+task_writer = TaskWriter(SAVE_COALESCE_WINDOW)
+atexit.register(task_writer.close)
 
 # ------------------------- PROGRAM ENTRY POINT --------------------------
-print(BLUE + "╔═════════════════════════════════════════════╗" + ESCAPE)
-print(RED + "              🔨 TASK MANAGER 🔨" + ESCAPE)
-print(BLUE + "╚═════════════════════════════════════════════╝" + ESCAPE)
-
-# Note: When you see this weird escape sequence, it's just to display the string in bold
-print(BOLD + "———— Welcome! Please Login ————" + ESCAPE)
-
-# ==== Login Section ====
-# The thought here is to load the available usernames and passwords and check user input against
-# those loaded from user.txt. We'll loop 3 times if unsuccessful we'll exit the program after these failed attempts.
-
-# Login Loop
-while attempts > 0:
-    user_input_list = [input("Please Enter Your Username: "), input("Please Enter Your Password: ")]
-
-    logged_user_name = user_input_list[0]
-    # Looping through the even numbered credentials gives us a username
-    # Looping through odd numbered credentials gives us passwords
-    if user_input_list[0] in credentials_dict:
-        user_match = True
-    if user_match and user_input_list[1] == credentials_dict[logged_user_name]:
-        pass_match = True
-    else:
-        user_match = False
-
-    # If we match both a user and pass we set login_success to True
-    # if not we prompt user with the amount of attempts left
-    # ultimately if no attempts are left we'll exit the program
-    if user_match and pass_match:
-        print("Successful login!...")
-        login_success = True
-        logged_user_name = user_input_list[0]
-        break
-    else:
-        # Here we'll check how many attempts the user has and update the message as needed
-        # If none left we exit the program
-        # Note: Match/case is a Python 3.10 feature please make sure you have an
-        # up-to date install
-        match attempts:
-            case 2 | 3:
-                attempts -= 1
-                print(f"Incorrect, you have {attempts} attempts left...")
-            case _:
-                attempts -= 1
-                print("Sorry you tried too many times... Please contact your system admin")
-                print("Program will now exit...")
-                exit()
-
-# We'll consume our User class here after successful login
-# We'll need a set of if statements to understand the status of the logged-in user
-if login_success:
-    user_object = User(logged_user_name)
-    tasks = load_tasks("tasks.txt")
-    greet_user(logged_user_name)
+# Everything below only runs when the file is run directly, importing it (for example from
+# benchmark_export.py) gives us the functions, settings and shared state above without logging in
+if __name__ == "__main__":
+    # Call open_and_list_users save it to variable credentials_list
+    credentials_dict = open_users_to_dict("user.txt")
 
-if logged_user_name == "admin":
-    user_object.set_admin()
+    print(BLUE + "╔═════════════════════════════════════════════╗" + ESCAPE)
+    print(RED + "              🔨 TASK MANAGER 🔨" + ESCAPE)
+    print(BLUE + "╚═════════════════════════════════════════════╝" + ESCAPE)
 
-# We'll merge the user menu and admin menu dictionaries if admin else just present the user menu
-if user_object.is_admin:
-    presented_menu = user_menu_dict | admin_menu_dict
-else:
-    presented_menu = user_menu_dict
+    # Note: When you see this weird escape sequence, it's just to display the string in bold
+    print(BOLD + "———— Welcome! Please Login ————" + ESCAPE)
 
-# If login successful We'll move onto the main loop
-# Using the login_success bool we'll only run the following code after successful login
-while login_success:
+    # ==== Login Section ====
+    # The thought here is to load the available usernames and passwords and check user input against
+    # those loaded from user.txt. We'll loop 3 times if unsuccessful we'll exit the program after these failed attempts.
 
-    # Display Menu
-    display_menu(user_object, user_menu_dict, admin_menu_dict)
+    # Login Loop
+    while attempts > 0:
+        user_input_list = [input("Please Enter Your Username: "), input("Please Enter Your Password: ")]
 
-    # Prompt user for input
-    menu = input(": ").lower()
-
-    # Check users input against dictionary
-    if menu not in presented_menu:
-        print("You've entered something incorrectly... Please try again")
-        continue
-
-    match menu:
-        case "r":
-            # We'll call reg_user() here this function returns a dict with the updated users
-            credentials_dict = reg_user(credentials_dict)
+        logged_user_name = user_input_list[0]
+        # Looping through the even numbered credentials gives us a username
+        # Looping through odd numbered credentials gives us passwords
+        if user_input_list[0] in credentials_dict:
+            user_match = True
+        if user_match and user_input_list[1] == credentials_dict[logged_user_name]:
+            pass_match = True
+        else:
+            user_match = False
+
+        # If we match both a user and pass we set login_success to True
+        # if not we prompt user with the amount of attempts left
+        # ultimately if no attempts are left we'll exit the program
+        if user_match and pass_match:
+            print("Successful login!...")
+            login_success = True
+            logged_user_name = user_input_list[0]
+            break
+        else:
+            # Here we'll check how many attempts the user has and update the message as needed
+            # If none left we exit the program
+            # Note: Match/case is a Python 3.10 feature please make sure you have an
+            # up-to date install
+            match attempts:
+                case 2 | 3:
+                    attempts -= 1
+                    print(f"Incorrect, you have {attempts} attempts left...")
+                case _:
+                    attempts -= 1
+                    print("Sorry you tried too many times... Please contact your system admin")
+                    print("Program will now exit...")
+                    exit()
+
+    # We'll consume our User class here after successful login
+    # We'll need a set of if statements to understand the status of the logged-in user
+    if login_success:
+        user_object = User(logged_user_name)
+        active_project = open_project(DEFAULT_PROJECT)
+        greet_user(logged_user_name)
+
+    if logged_user_name == "admin":
+        user_object.set_admin()
+
+    # We'll merge the user menu and admin menu dictionaries if admin else just present the user menu
+    if user_object.is_admin:
+        presented_menu = user_menu_dict | admin_menu_dict
+    else:
+        presented_menu = user_menu_dict
 
-        case "a":
-            # call add_task() and save result to tasks, this will give us upto date tasks
-            tasks = add_task(credentials_dict, "tasks.txt")
+    # If login successful We'll move onto the main loop
+    # Using the login_success bool we'll only run the following code after successful login
+    while login_success:
 
-        case "va":
-            view_all(tasks)
+        # Pick up anything other sessions have appended to the tasks file since we last looked
+        active_project.tasks = refresh_tasks(active_project.tasks, active_project.tasks_path)
 
-        case "vm":
-            view_mine(tasks, "tasks.txt", credentials_dict, logged_user_name)
+        # Display Menu
+        print(BOLD + f"Project: {active_project.name}" + ESCAPE)
+        display_menu(user_object, user_menu_dict, admin_menu_dict)
 
-        case "ds":
-            display_stats(credentials_dict, tasks)
+        # Prompt user for input
+        menu = input(": ").lower()
 
-        case "gr":
-            gen_task_report(tasks)
-            gen_user_report(credentials_dict, tasks)
-            print(GREEN + BOLD + "Report generated!" + ESCAPE)
+        # Check users input against dictionary
+        if menu not in presented_menu:
+            print("You've entered something incorrectly... Please try again")
+            continue
 
-        case "e":
-            print("Goodbye!!!")
-            exit()
+        match menu:
+            case "r":
+                # We'll call reg_user() here this function returns a dict with the updated users
+                credentials_dict = reg_user(credentials_dict)
+
+            case "a":
+                # call add_task() and save result to tasks, this will give us upto date tasks
+                active_project.tasks = add_task(credentials_dict, active_project.tasks, active_project.tasks_path)
+
+            case "ar":
+                add_recurring_task(credentials_dict, active_project.recurring_tasks, active_project.tasks_path)
+
+            case "va":
+                sort_mode = choose_sort_mode()
+                if sort_mode == "f":
+                    view_all(enumerate(active_project.tasks))
+                elif sort_mode is not None:
+                    # The sort reads the file so we'll make sure our edits are in it first
+                    task_writer.flush()
+                    view_all(external_sort_tasks(active_project.tasks_path, sort_mode))
+
+            case "vm":
+                view_mine(active_project.tasks, active_project.tasks_path, credentials_dict, logged_user_name,
+                          active_project.recurring_tasks)
+
+            case "ds":
+                display_stats(credentials_dict, active_project.tasks, active_project.recurring_tasks)
+
+            case "gr":
+                gen_task_report(active_project.tasks, active_project.recurring_tasks)
+                gen_user_report(credentials_dict, active_project.tasks, active_project.recurring_tasks)
+                print(GREEN + BOLD + "Report generated!" + ESCAPE)
+
+            case "ex":
+                task_writer.flush()
+                export_menu(active_project.tasks_path)
+
+            case "p":
+                # Switching back to a project we've recently used doesn't need its file parsed again
+                switched_project = switch_project_menu(user_object)
+                if switched_project is not None:
+                    active_project = switched_project
+
+            case "e":
+                print("Goodbye!!!")
+                task_writer.close()
+                exit()